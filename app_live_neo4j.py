@@ -1,14 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
-from datetime import datetime, timedelta
+import pyarrow as pa
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
-import time
+from neo4j import GraphDatabase, Result, RoutingControl
 import logging
 
 # Load environment variables from .env file
@@ -23,7 +21,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -63,34 +61,182 @@ st.markdown("""
         margin-bottom: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.html(CUSTOM_CSS)
+
+# Display names for the standings and games tables (built once per cache fill)
+STANDINGS_DISPLAY_COLUMNS = {
+    'position': 'Pos', 'team': 'Team', 'games': 'GP', 'wins': 'W', 'losses': 'L',
+    'goals_for': 'GF', 'goals_against': 'GA', 'goal_diff': 'GD', 'points': 'P',
+    'points_per_game': 'P/GP', 'win_percentage': 'W%'
+}
+GAMES_DISPLAY_COLUMNS = {
+    'date': 'Date', 'home_team': 'Home Team', 'away_team': 'Away Team',
+    'score': 'Score', 'attendance': 'Attendance'
+}
+
+# Client-side number formatting for the standings table
+STANDINGS_COLUMN_CONFIG = {
+    'GD': st.column_config.NumberColumn(format="%+d"),
+    'P/GP': st.column_config.NumberColumn(format="%.2f"),
+    'W%': st.column_config.NumberColumn(format="%.1f%%"),
+}
+
+# Column dtypes for query results: counts are downcast to the smallest integer
+# type that holds the actual values ('unsigned'/'signed'), repeated team names
+# are stored as categories
+STANDINGS_DTYPES = {
+    'team': 'category', 'position': 'unsigned',
+    'games': 'unsigned', 'wins': 'unsigned', 'losses': 'unsigned',
+    'goals_for': 'unsigned', 'goals_against': 'unsigned', 'points': 'unsigned', 'goal_diff': 'signed'
+}
+LEADERBOARD_DTYPES = {
+    'team': 'category', 'rank': 'unsigned',
+    'goals': 'unsigned', 'assists': 'unsigned', 'penalties': 'unsigned',
+    'penalty_minutes': 'unsigned', 'games': 'unsigned'
+}
+GAMES_DTYPES = {'home_team': 'category', 'away_team': 'category'}
+
+def records_to_frame(records, dtypes):
+    """Build a DataFrame from query records with explicit column dtypes"""
+    df = pd.DataFrame.from_records(records)
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if dtype in ('unsigned', 'signed'):
+            # Width comes from the data, so unexpected values are never wrapped
+            df[col] = pd.to_numeric(df[col], downcast=dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+# Game scores are stored as "home-away", e.g. "4-2"
+SCORE_PATTERN = re.compile(r'(\d+)\s*-\s*(\d+)')
+
+# Player leaderboards are fetched once at the slider maximum and sliced per view;
+# rank and per-game rates are computed in the queries
+LEADERBOARD_MAX_ROWS = 50
+
+# Recent games are fetched once at the slider maximum and sliced per view
+GAMES_MAX_ROWS = 50
+
+TOP_SCORERS_QUERY = """
+    MATCH (p:Player)-[:SCORED]->(g:Goal)-[:IN_GAME]->(game:Game)
+          -[:PART_OF]->(:Season {name: $season})-[:PART_OF]->(:Competition {name: $competition}),
+          (p)-[:PLAYS_FOR]->(t:Team)
+    WITH p, t, count(g) AS goals, count(DISTINCT game) AS games
+    ORDER BY goals DESC, games ASC
+    LIMIT $limit
+    WITH collect({player: p.firstName + ' ' + p.lastName, team: t.name,
+                  goals: goals, games: games}) AS rows
+    UNWIND range(0, size(rows) - 1) AS i
+    RETURN i + 1 AS rank,
+           rows[i].player AS player,
+           rows[i].team AS team,
+           rows[i].goals AS goals,
+           rows[i].games AS games,
+           round(toFloat(rows[i].goals) / rows[i].games, 2) AS goals_per_game
+"""
+
+TOP_ASSISTS_QUERY = """
+    MATCH (p:Player)-[:ASSISTED_IN]->(g:Goal)-[:IN_GAME]->(game:Game)
+          -[:PART_OF]->(:Season {name: $season})-[:PART_OF]->(:Competition {name: $competition}),
+          (p)-[:PLAYS_FOR]->(t:Team)
+    WITH p, t, count(g) AS assists, count(DISTINCT game) AS games
+    ORDER BY assists DESC, games ASC
+    LIMIT $limit
+    WITH collect({player: p.firstName + ' ' + p.lastName, team: t.name,
+                  assists: assists, games: games}) AS rows
+    UNWIND range(0, size(rows) - 1) AS i
+    RETURN i + 1 AS rank,
+           rows[i].player AS player,
+           rows[i].team AS team,
+           rows[i].assists AS assists,
+           rows[i].games AS games,
+           round(toFloat(rows[i].assists) / rows[i].games, 2) AS assists_per_game
+"""
+
+PENALTY_LEADERS_QUERY = """
+    MATCH (p:Player)-[:COMMITTED]->(pen:Penalty)-[:IN_GAME]->(game:Game)
+          -[:PART_OF]->(:Season {name: $season})-[:PART_OF]->(:Competition {name: $competition}),
+          (p)-[:PLAYS_FOR]->(t:Team)
+    WITH p, t, count(pen) AS penalties, sum(pen.minutes) AS penalty_minutes,
+         count(DISTINCT game) AS games
+    ORDER BY penalties DESC, penalty_minutes DESC
+    LIMIT $limit
+    WITH collect({player: p.firstName + ' ' + p.lastName, team: t.name, penalties: penalties,
+                  penalty_minutes: penalty_minutes, games: games}) AS rows
+    UNWIND range(0, size(rows) - 1) AS i
+    RETURN i + 1 AS rank,
+           rows[i].player AS player,
+           rows[i].team AS team,
+           rows[i].penalties AS penalties,
+           rows[i].penalty_minutes AS penalty_minutes,
+           rows[i].games AS games,
+           round(toFloat(rows[i].penalties) / rows[i].games, 2) AS penalties_per_game
+"""
+
+@st.cache_resource
+def get_driver(uri, user, password):
+    """Create a Neo4j driver shared across reruns and sessions"""
+    return GraphDatabase.driver(
+        uri,
+        auth=(user, password),
+        max_connection_pool_size=int(os.getenv('NEO4J_MAX_CONNECTION_POOL_SIZE', '50')),
+        connection_acquisition_timeout=float(os.getenv('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', '30'))
+    )
 
 class Neo4jHockeyDatabase:
     """Direct Neo4j database connection for hockey statistics"""
     
+    # Indexes backing the {name: $param} lookups used by every query
+    INDEX_STATEMENTS = [
+        "CREATE INDEX season_name IF NOT EXISTS FOR (s:Season) ON (s.name)",
+        "CREATE INDEX competition_name IF NOT EXISTS FOR (c:Competition) ON (c.name)",
+        "CREATE INDEX team_name IF NOT EXISTS FOR (t:Team) ON (t.name)",
+        "CREATE INDEX game_date IF NOT EXISTS FOR (g:Game) ON (g.date)",
+    ]
+    
     def __init__(self):
         """Initialize Neo4j connection"""
         self.uri = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
         self.user = os.getenv('NEO4J_USERNAME', 'neo4j')
         self.password = os.getenv('NEO4J_PASSWORD', '')
+        self.database = os.getenv('NEO4J_DATABASE', 'neo4j')
         
         self.driver = None
         self.connected = False
         
         try:
-            self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+            self.driver = get_driver(self.uri, self.user, self.password)
             # Test connection
-            with self.driver.session() as session:
-                session.run("RETURN 1")
+            self.run_read("RETURN 1")
             self.connected = True
+            self.ensure_indexes()
         except Exception as e:
             st.error(f"❌ Could not connect to Neo4j database: {e}")
             st.info("🔧 Check your .env file with correct NEO4J_URI, NEO4J_USER and NEO4J_PASSWORD")
     
-    def close(self):
-        """Close the database connection"""
-        if self.driver:
-            self.driver.close()
+    @st.cache_resource
+    def ensure_indexes(_self):
+        """Create missing indexes once per process (skipped for read-only users)"""
+        with _self.driver.session(database=_self.database) as session:
+            for statement in _self.INDEX_STATEMENTS:
+                try:
+                    session.run(statement).consume()
+                except Exception as e:
+                    logging.warning(f"Could not create index ({statement}): {e}")
+        return True
+    
+    def run_read(self, query, parameters=None):
+        """Run a read query as a managed transaction (retried, routable to replicas)"""
+        return self.driver.execute_query(
+            query,
+            parameters or {},
+            database_=self.database,
+            routing_=RoutingControl.READ,
+            result_transformer_=Result.data
+        )
     
     def execute_query(self, query, parameters=None):
         """Execute a Cypher query and return results"""
@@ -98,138 +244,241 @@ class Neo4jHockeyDatabase:
             return []
         
         try:
-            with self.driver.session() as session:
-                result = session.run(query, parameters or {})
-                return [record.data() for record in result]
+            return self.run_read(query, parameters)
         except Exception as e:
             st.error(f"Database error: {e}")
             return []
     
-    @st.cache_data(ttl=600)
-    def get_competitions(_self):
-        """Get available competitions from database"""
-        query = "MATCH (c:Competition) RETURN c.name AS competition ORDER BY c.name"
-        results = _self.execute_query(query)
-        return [record['competition'] for record in results] if results else ["SHL"]
-    
-    @st.cache_data(ttl=600)
-    def get_seasons(_self):
-        """Get available seasons from database"""
-        query = "MATCH (s:Season) RETURN s.name AS season ORDER BY s.name DESC"
-        results = _self.execute_query(query)
-        return [record['season'] for record in results] if results else ["2024/2025", "2023/2024"]
+    def execute_queries(self, queries):
+        """Execute several (query, parameters) pairs concurrently"""
+        if not self.connected:
+            return [[] for _ in queries]
+        
+        try:
+            # The driver is thread-safe and opens a session per execute_query call
+            with ThreadPoolExecutor(max_workers=len(queries) or 1) as executor:
+                futures = [executor.submit(self.run_read, query, parameters) for query, parameters in queries]
+                return [future.result() for future in futures]
+        except Exception as e:
+            st.error(f"Database error: {e}")
+            return [[] for _ in queries]
     
     @st.cache_data(ttl=600)
-    def get_teams(_self):
-        """Get all teams from database"""
+    def get_filter_options(_self):
+        """Get competitions, seasons and teams for the sidebar in one query"""
         query = """
-        MATCH (t:Team) 
-        RETURN t.name AS name, t.shortName AS shortName 
-        ORDER BY t.name
+        CALL { MATCH (c:Competition) WITH c ORDER BY c.name RETURN collect(c.name) AS competitions }
+        CALL { MATCH (s:Season) WITH s ORDER BY s.name DESC RETURN collect(s.name) AS seasons }
+        CALL { MATCH (t:Team) WITH t ORDER BY t.name
+               RETURN collect({name: t.name, shortName: t.shortName}) AS teams }
+        RETURN competitions, seasons, teams
         """
         results = _self.execute_query(query)
-        return results if results else [
+        options = results[0] if results else {}
+        teams = options.get('teams') or [
             {"name": "Frölunda HC", "shortName": "FHC"},
             {"name": "Skellefteå AIK", "shortName": "SKE"}
         ]
+        return {
+            'competitions': options.get('competitions') or ["SHL"],
+            'seasons': options.get('seasons') or ["2024/2025", "2023/2024"],
+            'teams': {
+                "name": tuple(team['name'] for team in teams),
+                "shortName": tuple(team['shortName'] for team in teams)
+            }
+        }
+    
+    def get_competitions(self):
+        """Get available competitions from database"""
+        return self.get_filter_options()['competitions']
+    
+    def get_seasons(self):
+        """Get available seasons from database"""
+        return self.get_filter_options()['seasons']
+    
+    def get_teams(self):
+        """Get all teams from database as parallel name/shortName tuples"""
+        return self.get_filter_options()['teams']
     
     @st.cache_data(ttl=300)
     def get_standings(_self, competition, season):
-        """Get current standings for competition and season"""
+        """Get current standings (positions and per-game rates computed in Cypher)"""
         query = """
-        MATCH (t:Team)-[rel:PLAYED]->(g:Game)-[:PART_OF]->(s:Season {name: $season})
-        MATCH (s)-[:PART_OF]->(c:Competition {name: $competition})
-        RETURN t.name AS team,
-               count(g) AS games,
-               sum(CASE WHEN rel.result = 'W' THEN 1 ELSE 0 END) AS wins,
-               sum(CASE WHEN rel.result = 'L' THEN 1 ELSE 0 END) AS losses,
-               sum(rel.goalsFor) AS goals_for,
-               sum(rel.goalsAgainst) AS goals_against,
-               sum(rel.points) AS points
+        MATCH (:Competition {name: $competition})<-[:PART_OF]-(:Season {name: $season})
+              <-[:PART_OF]-(g:Game)<-[rel:PLAYED]-(t:Team)
+        WITH t.name AS team,
+             count(g) AS games,
+             count(CASE rel.result WHEN 'W' THEN 1 END) AS wins,
+             count(CASE rel.result WHEN 'L' THEN 1 END) AS losses,
+             sum(rel.goalsFor) AS goals_for,
+             sum(rel.goalsAgainst) AS goals_against,
+             sum(rel.points) AS points
         ORDER BY points DESC, goals_for DESC
+        WITH collect({team: team, games: games, wins: wins, losses: losses,
+                      goals_for: goals_for, goals_against: goals_against, points: points}) AS rows
+        UNWIND range(0, size(rows) - 1) AS i
+        WITH i, rows[i] AS row
+        RETURN i + 1 AS position,
+               row.team AS team,
+               row.games AS games,
+               row.wins AS wins,
+               row.losses AS losses,
+               row.goals_for AS goals_for,
+               row.goals_against AS goals_against,
+               row.points AS points,
+               row.goals_for - row.goals_against AS goal_diff,
+               round(toFloat(row.points) / row.games, 2) AS points_per_game,
+               round(100.0 * row.wins / row.games, 1) AS win_percentage
         """
         results = _self.execute_query(query, {"season": season, "competition": competition})
         return results if results else []
     
     @st.cache_data(ttl=300)
-    def get_top_scorers(_self, competition, season, limit=10):
-        """Get top goal scorers"""
-        query = """
-        MATCH (p:Player)-[:SCORED]->(g:Goal)-[:IN_GAME]->(game:Game)-[:PART_OF]->(s:Season {name: $season})
-        MATCH (s)-[:PART_OF]->(c:Competition {name: $competition})
-        MATCH (p)-[:PLAYS_FOR]->(t:Team)
-        RETURN p.firstName + ' ' + p.lastName AS player, 
-               t.name AS team, 
-               count(g) AS goals,
-               count(DISTINCT game) AS games
-        ORDER BY goals DESC, games ASC
-        LIMIT $limit
-        """
-        results = _self.execute_query(query, {"season": season, "competition": competition, "limit": limit})
-        return results if results else []
+    def get_standings_table(_self, competition, season):
+        """Get standings as a typed DataFrame with row highlight colours"""
+        standings = _self.get_standings(competition, season)
+        if not standings:
+            return pd.DataFrame()
+        
+        df = records_to_frame(standings, STANDINGS_DTYPES)
+        
+        # Row highlight: playoff positions (top 6) and bottom 2
+        df['highlight'] = np.select(
+            [df['position'] <= 6, df['position'] >= len(df) - 1],
+            ['background-color: #d4edda', 'background-color: #f8d7da'],
+            default=''
+        )
+        return df
     
     @st.cache_data(ttl=300)
-    def get_top_assists(_self, competition, season, limit=10):
-        """Get top assist providers"""
-        query = """
-        MATCH (p:Player)-[:ASSISTED_IN]->(g:Goal)-[:IN_GAME]->(game:Game)-[:PART_OF]->(s:Season {name: $season})
-        MATCH (s)-[:PART_OF]->(c:Competition {name: $competition})
-        MATCH (p)-[:PLAYS_FOR]->(t:Team)
-        RETURN p.firstName + ' ' + p.lastName AS player, 
-               t.name AS team, 
-               count(g) AS assists,
-               count(DISTINCT game) AS games
-        ORDER BY assists DESC, games ASC
-        LIMIT $limit
-        """
-        results = _self.execute_query(query, {"season": season, "competition": competition, "limit": limit})
-        return results if results else []
+    def get_standings_display(_self, competition, season):
+        """Get the standings with display column names and per-cell row styles"""
+        df = _self.get_standings_table(competition, season)
+        if df.empty:
+            return df, df
+        
+        display_df = df[list(STANDINGS_DISPLAY_COLUMNS)].rename(columns=STANDINGS_DISPLAY_COLUMNS)
+        # Style based on position, using the precomputed row highlight
+        styles = pd.DataFrame(
+            np.repeat(df['highlight'].to_numpy()[:, None], display_df.shape[1], axis=1),
+            index=display_df.index,
+            columns=display_df.columns
+        )
+        return display_df, styles
     
     @st.cache_data(ttl=300)
-    def get_penalty_leaders(_self, competition, season, limit=10):
-        """Get most penalized players"""
-        query = """
-        MATCH (p:Player)-[:COMMITTED]->(pen:Penalty)-[:IN_GAME]->(game:Game)-[:PART_OF]->(s:Season {name: $season})
-        MATCH (s)-[:PART_OF]->(c:Competition {name: $competition})
-        MATCH (p)-[:PLAYS_FOR]->(t:Team)
-        RETURN p.firstName + ' ' + p.lastName AS player, 
-               t.name AS team, 
-               count(pen) AS penalties,
-               sum(pen.minutes) AS penalty_minutes,
-               count(DISTINCT game) AS games
-        ORDER BY penalties DESC, penalty_minutes DESC
-        LIMIT $limit
-        """
-        results = _self.execute_query(query, {"season": season, "competition": competition, "limit": limit})
-        return results if results else []
+    def get_league_insights(_self, competition, season):
+        """Get league leaders, averages and points gaps from the standings"""
+        df = _self.get_standings_table(competition, season)
+        if df.empty:
+            return {}
+        
+        # Standings are sorted by points, so leaders and gaps are positional
+        teams = df['team'].to_numpy()
+        points = df['points'].to_numpy(dtype=np.int64)
+        goals_for = df['goals_for'].to_numpy(dtype=np.int64)
+        goals_against = df['goals_against'].to_numpy(dtype=np.int64)
+        best_offense = goals_for.argmax()
+        best_defense = goals_against.argmin()
+        
+        # Gap to second place, and from 6th (last playoff spot) to 7th
+        leader_gap = None
+        if len(points) >= 2:
+            leader_gap = int(points[0] - points[1])
+        playoff_gap = None
+        if len(points) > 6:
+            playoff_gap = int(points[5] - points[6])
+        elif len(points) == 6:
+            playoff_gap = 0
+        
+        return {
+            'leader': (str(teams[0]), int(points[0])),
+            'best_offense': (str(teams[best_offense]), int(goals_for[best_offense])),
+            'best_defense': (str(teams[best_defense]), int(goals_against[best_defense])),
+            'avg_points': float(points.mean()),
+            'avg_goals_for': float(goals_for.mean()),
+            'avg_goals_against': float(goals_against.mean()),
+            'leader_gap': leader_gap,
+            'playoff_gap': playoff_gap,
+        }
+    
+    @st.cache_data(ttl=300)
+    def get_player_leaderboards(_self, competition, season):
+        """Get goal, assist and penalty leaderboards (the three queries run concurrently)"""
+        parameters = {"season": season, "competition": competition, "limit": LEADERBOARD_MAX_ROWS}
+        goals, assists, penalties = _self.execute_queries([
+            (TOP_SCORERS_QUERY, parameters),
+            (TOP_ASSISTS_QUERY, parameters),
+            (PENALTY_LEADERS_QUERY, parameters),
+        ])
+        return {'goals': goals, 'assists': assists, 'penalties': penalties}
+    
+    def get_top_scorers(self, competition, season, limit=10):
+        """Get top goal scorers (up to LEADERBOARD_MAX_ROWS)"""
+        return self.get_player_leaderboards(competition, season)['goals'][:limit]
+    
+    def get_top_assists(self, competition, season, limit=10):
+        """Get top assist providers (up to LEADERBOARD_MAX_ROWS)"""
+        return self.get_player_leaderboards(competition, season)['assists'][:limit]
+    
+    def get_penalty_leaders(self, competition, season, limit=10):
+        """Get most penalized players (up to LEADERBOARD_MAX_ROWS)"""
+        return self.get_player_leaderboards(competition, season)['penalties'][:limit]
+    
+    @st.cache_data(ttl=300)
+    def get_leaderboard_table(_self, stat, competition, season):
+        """Get a LEADERBOARD_MAX_ROWS player leaderboard (ranked with per-game rates in Cypher) as an Arrow table"""
+        rows = _self.get_player_leaderboards(competition, season)[stat]
+        if not rows:
+            return pa.table({})
+        
+        df = records_to_frame(rows, LEADERBOARD_DTYPES)
+        return pa.Table.from_pandas(df, preserve_index=False)
     
     @st.cache_data(ttl=300)
     def get_recent_games(_self, competition, season, limit=15):
         """Get recent games"""
         query = """
-        MATCH (g:Game)-[:PART_OF]->(s:Season {name: $season})
-        MATCH (s)-[:PART_OF]->(c:Competition {name: $competition})
+        MATCH (:Competition {name: $competition})<-[:PART_OF]-(:Season {name: $season})
+              <-[:PART_OF]-(g:Game)
         RETURN g.date AS date, 
                g.homeTeam AS home_team, 
                g.awayTeam AS away_team, 
                g.score AS score,
-               g.spectators AS spectators,
-               g.title AS title
+               g.spectators AS spectators
         ORDER BY g.date DESC
         LIMIT $limit
         """
         results = _self.execute_query(query, {"season": season, "competition": competition, "limit": limit})
         return results if results else []
     
+    @st.cache_data(ttl=300)
+    def get_games_table(_self, competition, season):
+        """Get the GAMES_MAX_ROWS most recent games as a typed DataFrame with parsed goals"""
+        games = _self.get_recent_games(competition, season, GAMES_MAX_ROWS)
+        if not games:
+            return pd.DataFrame()
+        
+        df = records_to_frame(games, GAMES_DTYPES)
+        if 'score' in df.columns:
+            # Parse "home-away" scores once per cache fill (<NA> where unparseable)
+            goals = df['score'].str.extract(SCORE_PATTERN).astype('UInt8')
+            df['home_goals'], df['away_goals'] = goals[0], goals[1]
+        if 'spectators' in df.columns:
+            # Truncate like int() did, so fractional attendance cannot fail the Int64 cast
+            attendance = pd.to_numeric(df['spectators'], errors='coerce').pipe(np.trunc).astype('Int64').fillna(0)
+            df['attendance'] = attendance.map('{:,}'.format).where(attendance != 0, "N/A")
+        return df
+    
     @st.cache_data(ttl=300)
     def get_team_stats(_self, team_name, competition, season):
         """Get detailed team statistics"""
         query = """
-        MATCH (t:Team {name: $team_name})-[rel:PLAYED]->(g:Game)-[:PART_OF]->(s:Season {name: $season})
-        MATCH (s)-[:PART_OF]->(c:Competition {name: $competition})
+        MATCH (:Team {name: $team_name})-[rel:PLAYED]->(g:Game)
+              -[:PART_OF]->(:Season {name: $season})-[:PART_OF]->(:Competition {name: $competition})
         RETURN count(g) AS games,
-               sum(CASE WHEN rel.result = 'W' THEN 1 ELSE 0 END) AS wins,
-               sum(CASE WHEN rel.result = 'L' THEN 1 ELSE 0 END) AS losses,
+               count(CASE rel.result WHEN 'W' THEN 1 END) AS wins,
+               count(CASE rel.result WHEN 'L' THEN 1 END) AS losses,
                sum(rel.goalsFor) AS goals_for,
                sum(rel.goalsAgainst) AS goals_against,
                sum(rel.points) AS points,
@@ -239,22 +488,75 @@ class Neo4jHockeyDatabase:
         results = _self.execute_query(query, {"team_name": team_name, "season": season, "competition": competition})
         return results[0] if results else {}
     
-    def get_database_info(self):
-        """Get general database information"""
-        queries = {
-            "teams": "MATCH (t:Team) RETURN count(t) AS count",
-            "players": "MATCH (p:Player) RETURN count(p) AS count",
-            "games": "MATCH (g:Game) RETURN count(g) AS count",
-            "goals": "MATCH (goal:Goal) RETURN count(goal) AS count",
-            "penalties": "MATCH (pen:Penalty) RETURN count(pen) AS count"
-        }
-        
-        info = {}
-        for key, query in queries.items():
-            result = self.execute_query(query)
-            info[key] = result[0]['count'] if result else 0
-        
-        return info
+    @st.cache_data(ttl=600)
+    def get_database_info(_self):
+        """Get general database information (all node counts in one query)"""
+        query = """
+        CALL { MATCH (t:Team) RETURN count(t) AS teams }
+        CALL { MATCH (p:Player) RETURN count(p) AS players }
+        CALL { MATCH (g:Game) RETURN count(g) AS games }
+        CALL { MATCH (goal:Goal) RETURN count(goal) AS goals }
+        CALL { MATCH (pen:Penalty) RETURN count(pen) AS penalties }
+        RETURN teams, players, games, goals, penalties
+        """
+        results = _self.execute_query(query)
+        return results[0] if results else dict.fromkeys(
+            ["teams", "players", "games", "goals", "penalties"], 0
+        )
+
+@st.cache_resource
+def get_bar_template():
+    """Shared layout template for all bar charts (default theme, no legend)"""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    
+    template = go.layout.Template(pio.templates[pio.templates.default])
+    template.layout.showlegend = False
+    return template
+
+@st.cache_resource(ttl=300)
+def build_horizontal_bar(values, labels, title, value_label, label_label, height=None):
+    """Build a horizontal bar chart, reused across reruns with the same data"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(
+        go.Bar(
+            x=values,
+            y=labels,
+            orientation='h',
+            hovertemplate=f"{value_label}=%{{x}}<br>{label_label}=%{{y}}<extra></extra>"
+        ),
+        layout=dict(
+            title=title,
+            xaxis_title=value_label,
+            yaxis_title=label_label,
+            template=get_bar_template()
+        )
+    )
+    if height:
+        fig.update_layout(height=height)
+    return fig
+
+@st.cache_resource(ttl=300)
+def build_results_pie(wins, losses):
+    """Build the win/loss distribution pie chart"""
+    import plotly.express as px
+    
+    return px.pie(
+        values=[wins, losses],
+        names=['Wins', 'Losses'],
+        title="Match results"
+    )
+
+@st.cache_resource(ttl=300)
+def build_goals_bar(goals_for, goals_against):
+    """Build the goals for/against comparison bar chart"""
+    import plotly.graph_objects as go
+    
+    return go.Figure(
+        go.Bar(x=['Goals for', 'Goals against'], y=[goals_for, goals_against]),
+        layout=dict(title="Offense vs Defense", template=get_bar_template())
+    )
 
 def main():
     """Main application function"""
@@ -308,38 +610,35 @@ def main():
         st.success("Cache updated!")
         st.rerun()
     
-    # Main content tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Dashboard", "🏆 Teams", "👤 Players", "🏒 Games"])
+    # Main content views (only the selected view is rendered)
+    view = st.radio(
+        "View",
+        ["📊 Dashboard", "🏆 Teams", "👤 Players", "🏒 Games"],
+        horizontal=True,
+        label_visibility="collapsed"
+    )
     
-    with tab1:
+    if view == "📊 Dashboard":
         show_dashboard(db, selected_competition, selected_season)
-    
-    with tab2:
+    elif view == "🏆 Teams":
         show_teams(db, selected_competition, selected_season, teams)
-    
-    with tab3:
+    elif view == "👤 Players":
         show_players(db, selected_competition, selected_season)
-    
-    with tab4:
+    else:
         show_games(db, selected_competition, selected_season)
-    
-    # Clean up
-    db.close()
 
 def show_dashboard(db, competition, season):
     """Display main dashboard with live data"""
     st.header(f"📊 {competition} {season} Dashboard")
     
-    # Get standings for calculations
-    standings = db.get_standings(competition, season)
+    # Standings feed both the metrics and the charts below (cached, shared with the Teams view)
+    df = db.get_standings_table(competition, season)
     
-    if standings:
-        df = pd.DataFrame(standings)
-        
+    if not df.empty:
         # Calculate metrics
         total_teams = len(df)
-        total_games = df['games'].sum()
-        total_goals = df['goals_for'].sum()
+        total_games = int(df['games'].to_numpy().sum())
+        total_goals = int(df['goals_for'].to_numpy().sum())
         avg_goals_per_game = total_goals / total_games if total_games > 0 else 0
         
         # Key metrics
@@ -365,14 +664,13 @@ def show_dashboard(db, competition, season):
         with col1:
             st.subheader("🥅 Top scoring teams")
             top_teams = df.head(6)
-            fig = px.bar(
-                x=top_teams['goals_for'],
-                y=top_teams['team'],
-                orientation='h',
-                title="Goals scored this season",
-                labels={'x': 'Goals', 'y': 'Team'}
+            fig = build_horizontal_bar(
+                tuple(top_teams['goals_for']),
+                tuple(top_teams['team']),
+                "Goals scored this season",
+                'Goals',
+                'Team'
             )
-            fig.update_layout(showlegend=False)
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
@@ -384,12 +682,13 @@ def show_dashboard(db, competition, season):
     else:
         st.warning("⚠️ No data available for selected competition and season.")
 
+@st.fragment
 def show_teams(db, competition, season, teams):
     """Display team statistics"""
     st.header(f"🏆 {competition} {season} Team Statistics")
     
     # Team selector
-    team_options = ["📊 All teams (Table)"] + [f"🏒 {team['name']}" for team in teams]
+    team_options = ["📊 All teams (Table)", *(f"🏒 {name}" for name in teams['name'])]
     selected_option = st.selectbox("Select view:", team_options)
     
     if selected_option == "📊 All teams (Table)":
@@ -402,72 +701,50 @@ def show_standings(db, competition, season):
     """Display full standings table"""
     st.subheader("📊 Full standings")
     
-    standings = db.get_standings(competition, season)
+    df = db.get_standings_table(competition, season)
     
-    if standings:
-        df = pd.DataFrame(standings)
-        
-        # Add calculated columns
-        df['position'] = range(1, len(df) + 1)
-        df['goal_diff'] = df['goals_for'] - df['goals_against']
-        df['points_per_game'] = (df['points'] / df['games']).round(2)
-        df['win_percentage'] = (df['wins'] / df['games'] * 100).round(1)
-        
-        # Prepare display
-        display_df = df[['position', 'team', 'games', 'wins', 'losses', 
-                        'goals_for', 'goals_against', 'goal_diff', 'points', 
-                        'points_per_game', 'win_percentage']].copy()
-        
-        display_df.columns = ['Pos', 'Team', 'GP', 'W', 'L', 'GF', 'GA', 'GD', 'P', 'P/GP', 'W%']
-        
-        # Style based on position
-        def highlight_positions(row):
-            if row['Pos'] <= 6:  # Playoff positions
-                return ['background-color: #d4edda'] * len(row)
-            elif row['Pos'] >= len(display_df) - 1:  # Bottom 2
-                return ['background-color: #f8d7da'] * len(row)
-            else:
-                return [''] * len(row)
+    if not df.empty:
+        display_df, styles = db.get_standings_display(competition, season)
         
         # Apply styling without matplotlib dependency
         try:
-            styled_df = display_df.style.apply(highlight_positions, axis=1)
-            st.dataframe(styled_df, use_container_width=True, hide_index=True)
+            styled_df = display_df.style.apply(lambda _: styles, axis=None)
+            st.dataframe(styled_df, use_container_width=True, hide_index=True,
+                         column_config=STANDINGS_COLUMN_CONFIG)
         except:
             # Fallback without styling if matplotlib is not available
-            st.dataframe(display_df, use_container_width=True, hide_index=True)
+            st.dataframe(display_df, use_container_width=True, hide_index=True,
+                         column_config=STANDINGS_COLUMN_CONFIG)
+        
+        # League insights (computed once per cache fill)
+        insights = db.get_league_insights(competition, season)
         
-        # League insights
         st.markdown("---")
         col1, col2, col3 = st.columns(3)
         
         with col1:
             st.subheader("🥇 League leaders")
-            leader = df.iloc[0]
-            st.markdown(f"**Most points:** {leader['team']} ({leader['points']} p)")
-            
-            best_offense = df.loc[df['goals_for'].idxmax()]
-            st.markdown(f"**Best offense:** {best_offense['team']} ({best_offense['goals_for']} goals)")
-            
-            best_defense = df.loc[df['goals_against'].idxmin()]
-            st.markdown(f"**Best defense:** {best_defense['team']} ({best_defense['goals_against']} allowed)")
+            leader, leader_points = insights['leader']
+            st.markdown(f"**Most points:** {leader} ({leader_points} p)")
+            best_offense, most_goals = insights['best_offense']
+            st.markdown(f"**Best offense:** {best_offense} ({most_goals} goals)")
+            best_defense, fewest_allowed = insights['best_defense']
+            st.markdown(f"**Best defense:** {best_defense} ({fewest_allowed} allowed)")
         
         with col2:
             st.subheader("📊 Averages")
-            st.markdown(f"**Avg points:** {df['points'].mean():.1f}")
-            st.markdown(f"**Avg goals for:** {df['goals_for'].mean():.1f}")
-            st.markdown(f"**Avg goals against:** {df['goals_against'].mean():.1f}")
+            st.markdown(f"**Avg points:** {insights['avg_points']:.1f}")
+            st.markdown(f"**Avg goals for:** {insights['avg_goals_for']:.1f}")
+            st.markdown(f"**Avg goals against:** {insights['avg_goals_against']:.1f}")
         
         with col3:
             st.subheader("🎯 Interesting facts")
-            if len(df) >= 2:
-                gap = df.iloc[0]['points'] - df.iloc[1]['points']
-                st.markdown(f"**Leader gap:** {gap} points")
+            if insights['leader_gap'] is not None:
+                st.markdown(f"**Leader gap:** {insights['leader_gap']} points")
                 
                 # Playoff line analysis
-                if len(df) >= 6:
-                    playoff_gap = df.iloc[5]['points'] - df.iloc[6]['points'] if len(df) > 6 else 0
-                    st.markdown(f"**Playoff race:** {playoff_gap} points gap")
+                if insights['playoff_gap'] is not None:
+                    st.markdown(f"**Playoff race:** {insights['playoff_gap']} points gap")
     
     else:
         st.error("❌ Could not load standings data")
@@ -509,20 +786,12 @@ def show_team_details(db, team_name, competition, season):
         
         with col1:
             st.subheader("📊 Win/Loss distribution")
-            fig = px.pie(
-                values=[team_stats['wins'], team_stats['losses']],
-                names=['Wins', 'Losses'],
-                title="Match results"
-            )
+            fig = build_results_pie(team_stats['wins'], team_stats['losses'])
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             st.subheader("⚽ Goals comparison")
-            fig = px.bar(
-                x=['Goals for', 'Goals against'],
-                y=[team_stats['goals_for'], team_stats['goals_against']],
-                title="Offense vs Defense"
-            )
+            fig = build_goals_bar(team_stats['goals_for'], team_stats['goals_against'])
             st.plotly_chart(fig, use_container_width=True)
     
     else:
@@ -544,150 +813,138 @@ def show_players(db, competition, season):
     with tab3:
         show_player_penalties(db, competition, season)
 
+@st.fragment
 def show_player_goals(db, competition, season):
     """Display top goal scorers"""
     st.subheader("🥅 Top goal scorers")
     
-    limit = st.slider("Number of players to show:", 5, 50, 15)
+    limit = st.slider("Number of players to show:", 5, LEADERBOARD_MAX_ROWS, 15)
     
-    scorers = db.get_top_scorers(competition, season, limit)
+    table = db.get_leaderboard_table('goals', competition, season)
     
-    if scorers:
-        df = pd.DataFrame(scorers)
-        df['rank'] = range(1, len(df) + 1)
-        df['goals_per_game'] = (df['goals'] / df['games']).round(2)
+    if table.num_rows:
+        table = table.slice(0, limit)
         
         # Display table
-        display_df = df[['rank', 'player', 'team', 'goals', 'games', 'goals_per_game']].copy()
-        display_df.columns = ['Rank', 'Player', 'Team', 'Goals', 'Games', 'Goals/game']
+        display_table = table.select(['rank', 'player', 'team', 'goals', 'games', 'goals_per_game'])
+        display_table = display_table.rename_columns(['Rank', 'Player', 'Team', 'Goals', 'Games', 'Goals/game'])
         
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        st.dataframe(display_table, use_container_width=True, hide_index=True)
         
         # Top 10 chart
-        if len(df) >= 5:
+        if table.num_rows >= 5:
             st.subheader("📊 Top 10 goal scorers")
-            top_10 = df.head(10)
-            fig = px.bar(
-                x=top_10['goals'],
-                y=top_10['player'],
-                orientation='h',
-                title="Goals this season",
-                labels={'x': 'Goals', 'y': 'Player'}
+            top_10 = table.slice(0, 10)
+            fig = build_horizontal_bar(
+                tuple(top_10['goals'].to_pylist()),
+                tuple(top_10['player'].to_pylist()),
+                "Goals this season",
+                'Goals',
+                'Player',
+                height=400
             )
-            fig.update_layout(showlegend=False, height=400)
             st.plotly_chart(fig, use_container_width=True)
     
     else:
         st.warning("⚠️ No goal scoring data available")
 
+@st.fragment
 def show_player_assists(db, competition, season):
     """Display top assist providers"""
     st.subheader("🎯 Top assist leaders")
     
-    limit = st.slider("Number of players to show:", 5, 50, 15, key="assists_limit")
+    limit = st.slider("Number of players to show:", 5, LEADERBOARD_MAX_ROWS, 15, key="assists_limit")
     
-    assists = db.get_top_assists(competition, season, limit)
+    table = db.get_leaderboard_table('assists', competition, season)
     
-    if assists:
-        df = pd.DataFrame(assists)
-        df['rank'] = range(1, len(df) + 1)
-        df['assists_per_game'] = (df['assists'] / df['games']).round(2)
+    if table.num_rows:
+        table = table.slice(0, limit)
         
         # Display table
-        display_df = df[['rank', 'player', 'team', 'assists', 'games', 'assists_per_game']].copy()
-        display_df.columns = ['Rank', 'Player', 'Team', 'Assists', 'Games', 'Assists/game']
+        display_table = table.select(['rank', 'player', 'team', 'assists', 'games', 'assists_per_game'])
+        display_table = display_table.rename_columns(['Rank', 'Player', 'Team', 'Assists', 'Games', 'Assists/game'])
         
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        st.dataframe(display_table, use_container_width=True, hide_index=True)
         
         # Top 10 chart
-        if len(df) >= 5:
+        if table.num_rows >= 5:
             st.subheader("📊 Top 10 assist leaders")
-            top_10 = df.head(10)
-            fig = px.bar(
-                x=top_10['assists'],
-                y=top_10['player'],
-                orientation='h',
-                title="Assists this season",
-                labels={'x': 'Assists', 'y': 'Player'}
+            top_10 = table.slice(0, 10)
+            fig = build_horizontal_bar(
+                tuple(top_10['assists'].to_pylist()),
+                tuple(top_10['player'].to_pylist()),
+                "Assists this season",
+                'Assists',
+                'Player',
+                height=400
             )
-            fig.update_layout(showlegend=False, height=400)
             st.plotly_chart(fig, use_container_width=True)
     
     else:
         st.warning("⚠️ No assist data available")
 
+@st.fragment
 def show_player_penalties(db, competition, season):
     """Display penalty leaders"""
     st.subheader("⚠️ Most penalized players")
     
-    limit = st.slider("Number of players to show:", 5, 50, 15, key="penalty_limit")
+    limit = st.slider("Number of players to show:", 5, LEADERBOARD_MAX_ROWS, 15, key="penalty_limit")
     
-    penalties = db.get_penalty_leaders(competition, season, limit)
+    table = db.get_leaderboard_table('penalties', competition, season)
     
-    if penalties:
-        df = pd.DataFrame(penalties)
-        df['rank'] = range(1, len(df) + 1)
-        df['penalties_per_game'] = (df['penalties'] / df['games']).round(2)
+    if table.num_rows:
+        table = table.slice(0, limit)
         
         # Display table
-        display_df = df[['rank', 'player', 'team', 'penalties', 'penalty_minutes', 'games', 'penalties_per_game']].copy()
-        display_df.columns = ['Rank', 'Player', 'Team', 'Penalties', 'PIM', 'Games', 'PEN/game']
+        display_table = table.select(['rank', 'player', 'team', 'penalties', 'penalty_minutes', 'games', 'penalties_per_game'])
+        display_table = display_table.rename_columns(['Rank', 'Player', 'Team', 'Penalties', 'PIM', 'Games', 'PEN/game'])
         
-        st.dataframe(display_df, use_container_width=True, hide_index=True)
+        st.dataframe(display_table, use_container_width=True, hide_index=True)
         
         # Top 10 chart
-        if len(df) >= 5:
+        if table.num_rows >= 5:
             st.subheader("📊 Top 10 most penalized")
-            top_10 = df.head(10)
+            top_10 = table.slice(0, 10)
             
             col1, col2 = st.columns(2)
             
             with col1:
-                fig = px.bar(
-                    x=top_10['penalties'],
-                    y=top_10['player'],
-                    orientation='h',
-                    title="Number of penalties",
-                    labels={'x': 'Penalties', 'y': 'Player'}
+                fig = build_horizontal_bar(
+                    tuple(top_10['penalties'].to_pylist()),
+                    tuple(top_10['player'].to_pylist()),
+                    "Number of penalties",
+                    'Penalties',
+                    'Player',
+                    height=400
                 )
-                fig.update_layout(showlegend=False, height=400)
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                fig = px.bar(
-                    x=top_10['penalty_minutes'],
-                    y=top_10['player'],
-                    orientation='h',
-                    title="Penalty minutes",
-                    labels={'x': 'Minutes', 'y': 'Player'}
+                fig = build_horizontal_bar(
+                    tuple(top_10['penalty_minutes'].to_pylist()),
+                    tuple(top_10['player'].to_pylist()),
+                    "Penalty minutes",
+                    'Minutes',
+                    'Player',
+                    height=400
                 )
-                fig.update_layout(showlegend=False, height=400)
                 st.plotly_chart(fig, use_container_width=True)
     
     else:
         st.warning("⚠️ No penalty data available")
 
+@st.fragment
 def show_games(db, competition, season):
     """Display recent games"""
     st.header(f"🏒 {competition} {season} Games")
     
-    limit = st.slider("Number of games to show:", 5, 50, 20)
+    limit = st.slider("Number of games to show:", 5, GAMES_MAX_ROWS, 20)
     
-    games = db.get_recent_games(competition, season, limit)
+    df = db.get_games_table(competition, season).head(limit)
     
-    if games:
-        df = pd.DataFrame(games)
-        
-        # Format the display
-        display_df = df[['date', 'home_team', 'away_team', 'score', 'spectators']].copy()
-        display_df.columns = ['Date', 'Home Team', 'Away Team', 'Score', 'Attendance']
-        
-        # Format attendance
-        if 'spectators' in df.columns:
-            display_df['Attendance'] = display_df['Attendance'].apply(
-                lambda x: f"{int(x):,}" if pd.notnull(x) and x != 0 else "N/A"
-            )
-        
+    if not df.empty:
+        # Format the display (attendance is pre-formatted in the cached table)
+        display_df = df[list(GAMES_DISPLAY_COLUMNS)].rename(columns=GAMES_DISPLAY_COLUMNS)
         st.dataframe(display_df, use_container_width=True, hide_index=True)
         
         # Game statistics
@@ -712,19 +969,18 @@ def show_games(db, competition, season):
             with col2:
                 st.subheader("⚽ Goal statistics")
                 if 'score' in df.columns:
-                    try:
-                        # Parse scores to calculate goal statistics
-                        scores = df['score'].str.split('-', expand=True)
-                        if len(scores.columns) >= 2:
-                            scores = scores.astype(int)
-                            total_goals = scores.sum().sum()
-                            avg_goals = total_goals / len(df)
-                            highest_score = df.loc[scores.sum(axis=1).idxmax(), 'score']
-                            
-                            st.metric("Total goals", total_goals)
-                            st.metric("Avg goals/game", f"{avg_goals:.1f}")
-                            st.metric("Highest scoring game", highest_score)
-                    except:
+                    # Goal statistics from the pre-parsed scores, skipping unparseable ones
+                    goals = df[['home_goals', 'away_goals']].dropna()
+                    if not goals.empty:
+                        game_goals = goals.to_numpy(dtype=np.int32).sum(axis=1)
+                        total_goals = int(game_goals.sum())
+                        avg_goals = total_goals / len(game_goals)
+                        highest_score = df.at[goals.index[game_goals.argmax()], 'score']
+
+                        st.metric("Total goals", total_goals)
+                        st.metric("Avg goals/game", f"{avg_goals:.1f}")
+                        st.metric("Highest scoring game", highest_score)
+                    else:
                         st.info("Could not analyze goal statistics")
     
     else: